@@ -1,71 +1,182 @@
+import asyncio
+import functools
 import inspect
-from typing import Annotated, Callable, List
+import re
+from typing import Annotated, Callable
 
-import pandas as pd
-from bs4 import BeautifulSoup
-from io import StringIO
+import xlsxwriter
+from io import BytesIO
+from lxml import etree
 
 from semantic_kernel.functions import kernel_function
 from models.messages_kernel import AgentType
 import json
-from typing import get_type_hints
+from typing import get_args, get_origin, get_type_hints
+
+# Matches numeric cell text such as "42", "-3.5" or "$150,000"
+_NUMERIC_CELL_PATTERN = re.compile(r"^-?\$?\d[\d,]*(\.\d+)?$")
+
+# Compiled once and reused: locate tables, their own rows (not those of nested tables)
+# and the header/data cells in each row
+_TABLE_XPATH = etree.XPath("//table")
+_ROW_XPATH = etree.XPath("./tr|./thead/tr|./tbody/tr|./tfoot/tr")
+_CELL_XPATH = etree.XPath("th|td")
+
+# Elements whose text does not belong to the cell containing them
+_SKIPPED_CELL_TAGS = frozenset({"table", "script", "style"})
+
+# Upper bounds for cell spans: the HTML limits, and the size of an xlsx worksheet
+_MAX_COLSPAN = 1000
+_MAX_ROWSPAN = 65534
+_XLSX_MAX_COLS = 16384
+_XLSX_MAX_ROWS = 1048576
+
+# XlsxWriter options for extracted tables. constant_memory streams each row out once it is complete,
+# keeping memory flat for large tables, and writes strings inline rather than through the shared
+# strings table, which only pays off for repeated values. Cell text is never reinterpreted as a
+# number, URL or formula.
+_WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_numbers': False,
+    'strings_to_urls': False,
+    'strings_to_formulas': False,
+}
+
+# Placeholder extraction result returned by read_document_contents
+_SAMPLE_HTML = """Here are the extracted tables in HTML format: 1. **Sales Numbers for Q1:** <table border='1' style='border-collapse:collapse;width:50%;'> <thead> <tr> <th>Quarter</th> <th>Bicycle Sales</th> <th>Helmet Sales</th> <th>Total Sales</th> </tr> </thead> <tbody> <tr> <td>Q1</td> <td>$150,000</td> <td>$75,000</td> <td>$225,000</td> </tr> <tr> <td>Q2</td> <td>$180,000</td> <td>$90,000</td> <td>$270,000</td> </tr> <tr> <td>Q3</td> <td>$210,000</td> <td>$105,000</td> <td>$315,000</td> </tr> <tr> <td>Q4</td> <td>$240,000</td> <td>$120,000</td> <td>$360,000</td> </tr> </tbody></table>2. **Projected Sales Numbers:**<table border='1' style='border-collapse:collapse;width:50%;'> <thead> <tr> <th>Quarter</th> <th>Projected Bicycle Sales</th> <th>Projected Helmet Sales</th> <th>Projected Total Sales</th> </tr> </thead> <tbody> <tr> <td>Q1</td> <td>$270,000</td> <td>$135,000</td> <td>$405,000</td> </tr> <tr> <td>Q2</td> <td>$300,000</td> <td>$150,000</td> <td>$450,000</td> </tr> <tr> <td>Q3</td> <td>$330,000</td> <td>$165,000</td> <td>$495,000</td> </tr> <tr> <td>Q4</td> <td>$360,000</td> <td>$180,000</td> <td>$540,000</td> </tr> </tbody></table>"""
+
+# Maps parameter type hints to the type names used in the tools JSON document
+_PARAM_TYPE_MAP = {int: "int", float: "float", bool: "boolean", str: "string", bytes: "string"}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_type_hints(method: Callable) -> dict:
+    """Memoized get_type_hints, so each method's hints are resolved once per process."""
+    return get_type_hints(method)
+
+
+def _span(cell: etree._Element, attribute: str, limit: int) -> int:
+    """Read a colspan/rowspan attribute clamped to 1..limit, treating invalid values as 1."""
+    try:
+        return min(limit, max(1, int(cell.get(attribute, 1))))
+    except ValueError:
+        return 1
+
+
+def _cell_text(element: etree._Element) -> str:
+    """Collect an element's text, skipping nested tables, scripts, styles and comments."""
+    parts = [element.text or ""]
+    for child in element:
+        # Comments and processing instructions have a non-string tag
+        if isinstance(child.tag, str) and child.tag not in _SKIPPED_CELL_TAGS:
+            parts.append(_cell_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _save_to_excel_sync(html_content: str) -> bytes:
+    """Blocking implementation of DocumentTools.save_to_excel."""
+    # Parse the HTML content as UTF-8 bytes: lxml rejects str input that carries an XML encoding
+    # declaration, and the explicit parser encoding keeps non-ASCII text from being read as Latin-1.
+    # etree.HTML returns None when there is nothing to parse.
+    tree = etree.HTML(html_content.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+    tables = _TABLE_XPATH(tree) if tree is not None else []
+
+    # Create an XlsxWriter workbook backed by an in-memory buffer
+    buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, _WORKBOOK_OPTIONS)
+
+    # Write each table's cells straight to its own sheet, row by row
+    for i, table in enumerate(tables):
+        worksheet = workbook.add_worksheet(f'Table_{i+1}')
+        rows = _ROW_XPATH(table)[:_XLSX_MAX_ROWS]
+        # For each column covered by a rowspan from a row above: the row index where the span
+        # ends and the first column after it, so a covered span is skipped in a single step
+        covered: dict[int, tuple[int, int]] = {}
+        for row_index, row in enumerate(rows):
+            col_index = 0
+            for cell in _CELL_XPATH(row):
+                while covered.get(col_index, (0, 0))[0] > row_index:
+                    col_index = covered[col_index][1]
+                if col_index >= _XLSX_MAX_COLS:
+                    break
+                colspan = min(_span(cell, 'colspan', _MAX_COLSPAN), _XLSX_MAX_COLS - col_index)
+                # Only rows that exist in this table can be covered
+                span_end = min(row_index + _span(cell, 'rowspan', _MAX_ROWSPAN), len(rows))
+                if span_end > row_index + 1:
+                    for spanned_col in range(col_index, col_index + colspan):
+                        if covered.get(spanned_col, (0, 0))[0] < span_end:
+                            covered[spanned_col] = (span_end, col_index + colspan)
+
+                text = _cell_text(cell).strip()
+                if text:
+                    if _NUMERIC_CELL_PATTERN.match(text):
+                        worksheet.write_number(row_index, col_index, float(text.replace('$', '').replace(',', '')))
+                    else:
+                        worksheet.write_string(row_index, col_index, text)
+                col_index += colspan
+
+    # Finalize the workbook and return its bytes
+    workbook.close()
+    return buffer.getvalue()
 
 
 class DocumentTools:
     # Define Document tools (functions)
-    formatting_instructions = "Instructions: You help read documents, extract information, and save extracted table inforamtion to an excel file. " \
+    formatting_instructions = "Instructions: You help read documents, extract information, and save extracted table inforamtion to an excel file. "
     agent_name = AgentType.HR.value
+    # Populated once at import time, see the bottom of this module
+    _kernel_functions: dict[str, Callable] = {}
+    _tools_json_doc: str = ""
 
     @staticmethod
     @kernel_function(description="Read contents of the data provided, extract tables and return them on HTML format.")
-    async def read_document_contents(document: bytes ) -> str:
-        #"placeholder for reading document contents and extracting tables"
-        html_content= """
-        Here are the extracted tables in HTML format: 1. **Sales Numbers for Q1:** <table border='1' style='border-collapse:collapse;width:50%;'> <thead> <tr> <th>Quarter</th> <th>Bicycle Sales</th> <th>Helmet Sales</th> <th>Total Sales</th> </tr> </thead> <tbody> <tr> <td>Q1</td> <td>$150,000</td> <td>$75,000</td> <td>$225,000</td> </tr> <tr> <td>Q2</td> <td>$180,000</td> <td>$90,000</td> <td>$270,000</td> </tr> <tr> <td>Q3</td> <td>$210,000</td> <td>$105,000</td> <td>$315,000</td> </tr> <tr> <td>Q4</td> <td>$240,000</td> <td>$120,000</td> <td>$360,000</td> </tr> </tbody></table>2. **Projected Sales Numbers:**<table border='1' style='border-collapse:collapse;width:50%;'> <thead> <tr> <th>Quarter</th> <th>Projected Bicycle Sales</th> <th>Projected Helmet Sales</th> <th>Projected Total Sales</th> </tr> </thead> <tbody> <tr> <td>Q1</td> <td>$270,000</td> <td>$135,000</td> <td>$405,000</td> </tr> <tr> <td>Q2</td> <td>$300,000</td> <td>$150,000</td> <td>$450,000</td> </tr> <tr> <td>Q3</td> <td>$330,000</td> <td>$165,000</td> <td>$495,000</td> </tr> <tr> <td>Q4</td> <td>$360,000</td> <td>$180,000</td> <td>$540,000</td> </tr> </tbody></table>"
-        """
-        return (html_content)
-            
+    async def read_document_contents(document: bytes) -> str:
+        # placeholder for reading document contents and extracting tables
+        return _SAMPLE_HTML
+
     @staticmethod
     @kernel_function(description="Save the extracted HTML tables to an Excel file.")
     async def save_to_excel(html_content: str) -> bytes:
-            """
+        """
         Converts HTML tables in the provided HTML content to an Excel file.
-        
+
         Args:
             html_content (str): The HTML content containing tables.
-        
+
         Returns:
-            bytes: The function saves the Excel file as 'output.xlsx'.
-    """
+            bytes: The contents of the generated Excel file.
+        """
 
-        # Parse the HTML content
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Parsing and workbook generation are CPU-bound, so run them off the event loop
+        return await asyncio.to_thread(_save_to_excel_sync, html_content)
 
-        # Find all tables in the HTML
-        tables = soup.find_all('table')
+    @classmethod
+    def get_all_kernel_functions(cls) -> dict[str, Callable]:
+        """
+        Returns a dictionary of all methods in this class that have the @kernel_function annotation.
+        This function itself is not annotated with @kernel_function.
 
-        # Create a Pandas Excel writer using XlsxWriter as the engine
-        excel_writer = pd.ExcelWriter('output.xlsx', engine='xlsxwriter')
+        Returns:
+            Dict[str, Callable]: Dictionary with function names as keys and function objects as values
+        """
+        # Return a copy so callers cannot alter the precomputed tool set
+        return dict(cls._kernel_functions)
 
-        # Iterate over the tables and convert each to a DataFrame
-        for i, table in enumerate(tables):
-            # Read the HTML table into a DataFrame
-            df = pd.read_html(StringIO(str(table)))[0]
-            # Write the DataFrame to a specific sheet in the Excel file
-            df.to_excel(excel_writer, sheet_name=f'Table_{i+1}', index=False)
+    @classmethod
+    def generate_tools_json_doc(cls) -> str:
+        """
+        Generate a JSON document containing information about all methods in the class.
 
-        # Save the Excel file
-        excel_writer.close()
-        # Get the bytes of the Excel file
-        with open('output.xlsx', 'rb') as f:
-            excel_bytes = f.read()
-        return excel_bytes
+        Returns:
+            str: JSON string containing the methods' information
+        """
+        return cls._tools_json_doc
 
     @classmethod
-    def get_all_kernel_functions(cls) -> dict[str, Callable]:
+    def _discover_kernel_functions(cls) -> dict[str, Callable]:
         """
-        Returns a dictionary of all methods in this class that have the @kernel_function annotation.
-        This function itself is not annotated with @kernel_function.
+        Introspect the class for methods that have the @kernel_function annotation.
 
         Returns:
             Dict[str, Callable]: Dictionary with function names as keys and function objects as values
@@ -79,24 +190,19 @@ class DocumentTools:
                 continue
 
             # Check if the method has the kernel_function annotation
-            # by looking at its __annotations__ attribute
-            method_attrs = getattr(method, "__annotations__", {})
-            if hasattr(method, "__kernel_function__") or "kernel_function" in str(
-                method_attrs
-            ):
+            if hasattr(method, "__kernel_function__"):
                 kernel_functions[name] = method
 
         return kernel_functions
 
     @classmethod
-    def generate_tools_json_doc(cls) -> str:
+    def _build_tools_json_doc(cls) -> str:
         """
-        Generate a JSON document containing information about all methods in the class.
+        Introspect the kernel functions and build the JSON document describing them.
 
         Returns:
             str: JSON string containing the methods' information
         """
-
         tools_list = []
 
         # Get all methods from the class that have the kernel_function annotation
@@ -123,7 +229,7 @@ class DocumentTools:
                 args_dict = {}
 
                 # Get type hints if available
-                type_hints = get_type_hints(method)
+                type_hints = _get_type_hints(method)
 
                 # Process parameters
                 for param_name, param in sig.parameters.items():
@@ -131,24 +237,11 @@ class DocumentTools:
                     if param_name in ["cls", "self"]:
                         continue
 
-                    # Get parameter type
-                    param_type = "string"  # Default type
-                    if param_name in type_hints:
-                        type_obj = type_hints[param_name]
-                        # Convert type to string representation
-                        if hasattr(type_obj, "__name__"):
-                            param_type = type_obj.__name__.lower()
-                        else:
-                            # Handle complex types like List, Dict, etc.
-                            param_type = str(type_obj).lower()
-                            if "int" in param_type:
-                                param_type = "int"
-                            elif "float" in param_type:
-                                param_type = "float"
-                            elif "bool" in param_type:
-                                param_type = "boolean"
-                            else:
-                                param_type = "string"
+                    # Get parameter type, unwrapping Annotated[...] to its underlying type
+                    type_obj = type_hints.get(param_name)
+                    if get_origin(type_obj) is Annotated:
+                        type_obj = get_args(type_obj)[0]
+                    param_type = _PARAM_TYPE_MAP.get(type_obj, "string")
 
                     # Create parameter description
                     # param_desc = param_name.replace("_", " ")
@@ -163,10 +256,15 @@ class DocumentTools:
                     "agent": cls.agent_name,  # Use HR agent type
                     "function": name,
                     "description": description,
-                    "arguments": json.dumps(args_dict).replace('"', "'"),
+                    "arguments": repr(args_dict),  # Single-quoted, matching the other tools
                 }
 
                 tools_list.append(tool_entry)
 
         # Return the JSON string representation
         return json.dumps(tools_list, ensure_ascii=False, indent=2)
+
+
+# The decorated methods are fixed at class definition, so run the introspection once at import time
+DocumentTools._kernel_functions = DocumentTools._discover_kernel_functions()
+DocumentTools._tools_json_doc = DocumentTools._build_tools_json_doc()
@@ -0,0 +1,163 @@
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+from lxml import etree
+
+# Add the backend directory to the Python path so the tools' own imports resolve
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kernel_tools.document_tools import DocumentTools  # noqa: E402
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_sheets(xlsx_bytes):
+    """Return {sheet name: {cell reference: value}} for an xlsx file, numbers as floats."""
+    with zipfile.ZipFile(io.BytesIO(xlsx_bytes)) as xlsx:
+        workbook = etree.fromstring(xlsx.read("xl/workbook.xml"))
+        names = [sheet.get("name") for sheet in workbook.iterfind(".//m:sheet", NS)]
+        sheets = {}
+        for index, name in enumerate(names, start=1):
+            sheet = etree.fromstring(xlsx.read(f"xl/worksheets/sheet{index}.xml"))
+            cells = {}
+            for cell in sheet.iterfind(".//m:c", NS):
+                if cell.get("t") == "inlineStr":
+                    cells[cell.get("r")] = "".join(cell.find("m:is", NS).itertext())
+                else:
+                    cells[cell.get("r")] = float(cell.findtext("m:v", namespaces=NS))
+            sheets[name] = cells
+        return sheets
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_sample_tables():
+    """Each sample table gets its own sheet, with currency values stored as numbers."""
+    html_content = await DocumentTools.read_document_contents(b"")
+    sheets = read_sheets(await DocumentTools.save_to_excel(html_content))
+
+    assert list(sheets) == ["Table_1", "Table_2"]
+    table = sheets["Table_1"]
+    assert table["A1"] == "Quarter"
+    assert table["D1"] == "Total Sales"
+    assert table["A2"] == "Q1"
+    assert table["B2"] == 150000
+    assert table["D5"] == 360000
+    assert sheets["Table_2"]["D5"] == 540000
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_numeric_and_empty_cells():
+    """Numeric text becomes a number, other text stays a string and empty cells are skipped."""
+    html_content = "<table><tr><td>-3.5</td><td>1,200</td><td>Q1 2024</td><td> </td><td>n/a</td></tr></table>"
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    assert cells == {"A1": -3.5, "B1": 1200, "C1": "Q1 2024", "E1": "n/a"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("html_content", ["", "<p>No tables here</p>"])
+async def test_save_to_excel_without_tables(html_content):
+    """Input without tables still produces a valid, empty workbook."""
+    sheets = read_sheets(await DocumentTools.save_to_excel(html_content))
+
+    assert all(not cells for cells in sheets.values())
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_xml_declaration_and_unicode():
+    """An XML encoding declaration is accepted and non-ASCII text is preserved."""
+    html_content = '<?xml version="1.0" encoding="utf-8"?><table><tr><td>Café €</td></tr></table>'
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    assert cells == {"A1": "Café €"}
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_colspan():
+    """A colspan pushes the following cells of the row to the right."""
+    html_content = (
+        "<table>"
+        "<tr><th colspan='2'>Sales</th><th>Total</th></tr>"
+        "<tr><td>1</td><td>2</td><td>3</td></tr>"
+        "</table>"
+    )
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    assert cells == {"A1": "Sales", "C1": "Total", "A2": 1, "B2": 2, "C2": 3}
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_rowspan():
+    """A rowspan reserves its column in the rows below."""
+    html_content = (
+        "<table>"
+        "<tr><td rowspan='2'>Q1</td><td>a</td><td>b</td></tr>"
+        "<tr><td>c</td><td>d</td></tr>"
+        "<tr><td>Q2</td><td>e</td><td>f</td></tr>"
+        "</table>"
+    )
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    assert cells == {
+        "A1": "Q1", "B1": "a", "C1": "b",
+        "B2": "c", "C2": "d",
+        "A3": "Q2", "B3": "e", "C3": "f",
+    }
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_oversized_spans():
+    """Spans are clamped to the HTML limits and to the rows of the table."""
+    html_content = (
+        "<table>"
+        "<tr><td rowspan='20000000' colspan='20000000'>a</td><td>b</td></tr>"
+        "<tr><td>c</td></tr>"
+        "</table>"
+    )
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    # colspan is clamped to 1000, so the following cells start at column 1001 (ALM)
+    assert cells == {"A1": "a", "ALM1": "b", "ALM2": "c"}
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_nested_table():
+    """A nested table gets its own sheet and its rows are not added to the outer one."""
+    html_content = (
+        "<table>"
+        "<thead><tr><th>Name</th><th>Detail</th></tr></thead>"
+        "<tbody><tr><td>Outer</td><td>See <table><tr><td>In</td><td>ner</td></tr></table>below</td></tr></tbody>"
+        "</table>"
+    )
+    sheets = read_sheets(await DocumentTools.save_to_excel(html_content))
+
+    assert list(sheets) == ["Table_1", "Table_2"]
+    assert {ref[1:] for ref in sheets["Table_1"]} == {"1", "2"}
+    assert sheets["Table_1"]["A2"] == "Outer"
+    # The nested table's text is kept out of the outer cell
+    assert sheets["Table_1"]["B2"] == "See below"
+    assert sheets["Table_2"] == {"A1": "In", "B1": "ner"}
+
+
+@pytest.mark.asyncio
+async def test_save_to_excel_skips_script_and_style_text():
+    """Script, style and comment content is not copied into cells."""
+    html_content = (
+        "<table><tr><td><style>td {}</style>Total<script>var x = 1;</script><!-- note --> <b>42</b></td></tr></table>"
+    )
+    cells = read_sheets(await DocumentTools.save_to_excel(html_content))["Table_1"]
+
+    assert cells == {"A1": "Total 42"}
+
+
+def test_get_all_kernel_functions_returns_copy():
+    """Mutating the returned dict does not affect later calls."""
+    kernel_functions = DocumentTools.get_all_kernel_functions()
+    assert set(kernel_functions) == {"read_document_contents", "save_to_excel"}
+
+    kernel_functions.clear()
+
+    assert set(DocumentTools.get_all_kernel_functions()) == {"read_document_contents", "save_to_excel"}